@@ -121,6 +121,53 @@ def days_infectious(days_between_tests: float, isolation_delay: float,
     return y
 
 
+def days_infectious_vec(days_between_tests: np.ndarray,
+                        isolation_delay: np.ndarray,
+                        sensitivity: np.ndarray, max_infectious_days: float):
+    """Return the expected time someone is infectious and free elementwise.
+
+    This is a vectorized [days_infectious] over arrays of surveillance
+    parameters that share [max_infectious_days]. The sum over n runs until
+    every element has stopped so each element matches [days_infectious].
+
+    Args:
+        days_between_tests (np.ndarray): Number of days between surveillance \
+            tests. Provide np.inf for no surveillance testing.
+        isolation_delay (np.ndarray): Number of days to isolate after \
+            positive test.
+        sensitivity (np.ndarray): Sensitivity of surveillance test.
+        max_infectious_days (float): Maximum infectious period.
+    """
+    T, D, sensitivity = np.broadcast_arrays(
+        np.asarray(days_between_tests, dtype=float),
+        np.asarray(isolation_delay, dtype=float),
+        np.asarray(sensitivity, dtype=float))
+    R = max_infectious_days
+
+    ret = np.full(T.shape, R, dtype=float)
+    tested = (T != np.inf) & (D != np.inf)
+    T, D, sensitivity = T[tested], D[tested], sensitivity[tested]
+    assert (T > 0).all()
+
+    n = 0
+    prob = np.ones(len(T))  # contains Prob(N>=n)
+    y = np.zeros(len(T))
+    active = D + (n*T) < R
+    while active.any():
+        T_n, D_n, f_n = T[active], D[active], sensitivity[active]
+        pn = f_n * np.power(1-f_n, n)  # Prob(N=n)
+        # E[days_infectious | N=n] as in _conditional_days_infectious
+        b = (R - D_n - n*T_n) / T_n
+        y_n = np.where(b < 0, 0, np.where(b > 1, 0.5, b * (1 - 0.5 * b)))
+        y[active] = y[active] + pn * (D_n + (n * T_n) + T_n * y_n)
+        prob[active] = prob[active] - pn
+        n = n+1
+        active = D + (n*T) < R
+    ret[tested] = y + prob*R
+
+    return ret
+
+
 def days_infectious_perfect_sensitivity(days_between_tests: float,
                                         isolation_delay: float,
                                         max_infectious_days: float):
@@ -9,13 +9,36 @@ testing strategies on a single scenario.
 __author__ = "Henry Robbins (henryrobbins)"
 
 
+import copy
+import json
+import hashlib
 import numpy as np
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from operator import itemgetter
 from typing import List, Dict
 from simpar.sim import Sim
 from simpar.groups import Population
 from simpar.strategy import Test, Strategy
 
 
+# Scenarios built by [Scenario.from_dictionary] keyed by dictionary contents
+_SCENARIO_CACHE = OrderedDict()
+_SCENARIO_CACHE_SIZE = 32
+
+
+def _packed_param(i: int, doc: str):
+    """Return a property viewing row [i] of the packed parameter matrix."""
+    def fget(self):
+        return self._params[i]
+
+    def fset(self, value):
+        self._params[i] = value
+
+    return property(fget, fset, doc=doc)
+
+
 class Scenario:
     """
     This class maintains a scenario on which a testing strategy can be applied.
@@ -24,8 +47,26 @@ class Scenario:
     the environment, and the disease spreading. By combining a scenario with a
     testing strategy, a simulation can be run allowing for the comparison of
     multiple testing strategies on a single scenario.
+
+    The per meta-group parameters are packed into the rows of a single
+    contiguous matrix and exposed as views of that matrix.
     """
 
+    infections_per_contact_unit = \
+        _packed_param(0, "Infections per contact unit across meta-groups.")
+    init_infections = \
+        _packed_param(1, "Initial infections across meta-groups.")
+    init_recovered = \
+        _packed_param(2, "Initial recovered across meta-groups.")
+    outside_rate = \
+        _packed_param(3, "Outside rate of infection across meta-groups.")
+    no_surveillance_test_rate = \
+        _packed_param(4, "Test rate without surveillance across meta-groups.")
+    pct_recovered_discovered = \
+        _packed_param(5, "Percentage of recovered discovered per meta-group.")
+    hospitalization_rates = \
+        _packed_param(6, "Hospitalization rates across meta-groups.")
+
     def __init__(self, population: Population, max_T: int,
                  generation_time: float,
                  infections_per_contact_unit: np.ndarray,
@@ -67,21 +108,43 @@ class Scenario:
         self.population = population
         self.max_T = max_T
         self.generation_time = generation_time
-        self.infections_per_contact_unit = infections_per_contact_unit
-        self.init_infections = init_infections
-        self.init_recovered = init_recovered
-        self.outside_rate = outside_rate
+        self._params = np.array([infections_per_contact_unit,
+                                 init_infections,
+                                 init_recovered,
+                                 outside_rate,
+                                 no_surveillance_test_rate,
+                                 pct_recovered_discovered,
+                                 hospitalization_rates], dtype=float)
         self.max_infectious_days = max_infectious_days
         self.symptomatic_rate = symptomatic_rate
-        self.no_surveillance_test_rate = no_surveillance_test_rate
-        self.pct_recovered_discovered = pct_recovered_discovered
-        self.hospitalization_rates = hospitalization_rates
         self.arrival_period = arrival_period
         self.tests = tests
 
     @staticmethod
     def from_dictionary(d: Dict):
-        """Initialize a [Scenario] instance from a dictionary."""
+        """Initialize a [Scenario] instance from a dictionary.
+
+        Scenarios are memoized on the contents of [d] so that rebuilding the
+        same scenario (e.g. in a sweep over strategies) only parses the
+        dictionary once. Each call returns an independent copy. Dictionaries
+        that can not be hashed (e.g. with mixed key types) are not cached.
+        """
+        key = _dictionary_key(d)
+        if key is None:
+            return Scenario._from_dictionary(d)
+        scenario = _SCENARIO_CACHE.get(key)
+        if scenario is None:
+            scenario = Scenario._from_dictionary(d)
+            _SCENARIO_CACHE[key] = scenario
+            if len(_SCENARIO_CACHE) > _SCENARIO_CACHE_SIZE:
+                _SCENARIO_CACHE.popitem(last=False)
+        else:
+            _SCENARIO_CACHE.move_to_end(key)
+        return copy.deepcopy(scenario)
+
+    @staticmethod
+    def _from_dictionary(d: Dict):
+        """Initialize a [Scenario] instance from a dictionary (uncached)."""
         max_T = d["max_T"]
         generation_time = d["generation_time"]
         max_infectious_days = d["max_infectious_days"]
@@ -89,21 +152,24 @@ class Scenario:
         tests = {k: Test.from_dictionary(k, v) for k,v in d["tests"].items()}
         population = Population.from_truncated_paretos_dictionary(d)
 
+        # one getter pulls every meta-group value of a field in order
         order = d["meta_groups"]
+        getter = itemgetter(*order)
+        n = len(order)
         infect_per_contact_unit = \
-            _to_np_array(d["infections_per_contact_unit"], order)
+            _to_np_array(d["infections_per_contact_unit"], getter, n)
         init_infections = \
-            _to_np_array(d["init_infections"], order)
+            _to_np_array(d["init_infections"], getter, n)
         init_recovered = \
-            _to_np_array(d["init_recovered"], order)
+            _to_np_array(d["init_recovered"], getter, n)
         outside_rate = \
-            _to_np_array(d["outside_rate"], order)
+            _to_np_array(d["outside_rate"], getter, n)
         no_surveillance_test_rate = \
-            _to_np_array(d["no_surveillance_test_rate"], order)
+            _to_np_array(d["no_surveillance_test_rate"], getter, n)
         pct_recovered_discovered = \
-            _to_np_array(d["pct_recovered_discovered"], order)
+            _to_np_array(d["pct_recovered_discovered"], getter, n)
         hospitalization_rates = \
-            _to_np_array(d["hospitalization_rates"], order)
+            _to_np_array(d["hospitalization_rates"], getter, n)
         arrival_period = d["arrival_period"]
 
         return Scenario(population=population, max_T=max_T,
@@ -120,49 +186,25 @@ class Scenario:
                         arrival_period=arrival_period,
                         tests=tests)
 
-    def simulate_strategy(self, strategy: Strategy):
-        """Return a simulation of the given strategy on this scenario."""
-        assert sum(strategy.period_lengths) == self.max_T
-        if self.arrival_period is None:
-            assert strategy.arrival_testing_regime is None
+    def simulate_strategy(self, strategy: Strategy, validate: bool = True):
+        """Return a simulation of the given strategy on this scenario.
 
-        population = self.population
+        Args:
+            strategy (Strategy): Strategy to simulate.
+            validate (bool): Check that the strategy is compatible with this \
+                scenario. Sweeps over known-good strategies can disable this.
+        """
+        if validate:
+            self._validate_strategy(strategy)
 
-        # Get initial infections and recovered based on arrival testing
-        # Additionally, compute those that are discovered and hidden
-        init_infections = strategy.get_initial_infections(self.init_infections)
-        init_recovered = strategy.get_initial_recovered(self.init_recovered,
-                                                        self.init_infections)
-        init_discovered = \
-            strategy.get_initial_discovered(self.init_recovered,
-                                            self.pct_recovered_discovered,
-                                            self.init_infections)
-        init_hidden = \
-            strategy.get_initial_hidden(self.init_recovered,
-                                        self.pct_recovered_discovered,
-                                        self.init_infections)
-        S0, I0, R0, D0, H0 = \
-            population.get_init_SIR_and_DH(init_infections, init_recovered,
-                                           init_discovered, init_hidden)
+        S0, I0, R0, D0, H0 = self._initial_state(strategy)
+        periods = zip(strategy.period_lengths,
+                      self._period_parameters(strategy))
 
         # Iterate through the time periods of the simulation
-        for i, period_length in enumerate(strategy.period_lengths):
-
-            testing_regime = strategy.testing_regimes[i]
-            infection_matrix = \
-                population.infection_matrix(self.infections_per_contact_unit) \
-                * strategy.transmission_multipliers[i]
-            infection_discovery_frac = \
-                population.infection_discovery_frac(
-                    testing_regime.get_infection_discovery_frac(
-                        self.symptomatic_rate))
-            recovered_discovery_frac = \
-                population.recovered_discovery_frac(
-                    testing_regime.get_recovered_discovery_frac(
-                        self.no_surveillance_test_rate))
-            outside_rate = \
-                population.outside_rate(self.outside_rate) * \
-                strategy.transmission_multipliers[i]
+        for i, (period_length, parameters) in enumerate(periods):
+            infection_matrix, infection_discovery_frac, \
+                recovered_discovery_frac, outside_rate = parameters
 
             # initialize sim
             if i == 0:
@@ -171,7 +213,7 @@ class Scenario:
                           init_discovered=D0, init_hidden=H0,
                           infection_rate=infection_matrix,
                           infection_discovery_frac=infection_discovery_frac,
-                          recovered_discovery_frac=infection_discovery_frac,
+                          recovered_discovery_frac=recovered_discovery_frac,
                           outside_rate=outside_rate)
 
             # step forward for this period length
@@ -182,7 +224,159 @@ class Scenario:
 
         return sim
 
+    def simulate_strategies(self, strategies: List[Strategy],
+                            workers: int = None, validate: bool = True):
+        """Return simulations of the given strategies on this scenario.
+
+        Strategies are independent of one another so they are simulated in
+        parallel across [workers] processes.
+
+        Args:
+            strategies (List[Strategy]): Strategies to simulate.
+            workers (int): Maximum number of worker processes. Defaults to \
+                the number of processors on the machine.
+            validate (bool): Check that each strategy is compatible with \
+                this scenario.
+        """
+        simulate = partial(self.simulate_strategy, validate=validate)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(simulate, strategies))
+
+    def simulate_strategies_batched(self, strategies: List[Strategy],
+                                    validate: bool = True):
+        """Return simulations of the given strategies on this scenario.
+
+        The strategies are run together as a single batched [Sim] so each
+        step advances every strategy at once. Strategies may switch periods
+        at different generations; the batch is stepped between the union of
+        their period boundaries.
+
+        Args:
+            strategies (List[Strategy]): Strategies to simulate.
+            validate (bool): Check that each strategy is compatible with \
+                this scenario.
+        """
+        assert len(strategies) > 0, "no strategies to simulate"
+        if validate:
+            for strategy in strategies:
+                self._validate_strategy(strategy)
+
+        S0, I0, R0, D0, H0 = \
+            (np.stack(x) for x in
+             zip(*[self._initial_state(s) for s in strategies]))
+        periods = [self._period_parameters(s) for s in strategies]
+        period_ends = [np.cumsum(s.period_lengths) for s in strategies]
+        boundaries = np.unique(np.concatenate([[0]] + period_ends))
+
+        sim = None
+        for start, end in zip(boundaries[:-1], boundaries[1:]):
+            # Parameters of the period each strategy is in at [start]
+            current = [p[np.searchsorted(ends, start, side="right")]
+                       for p, ends in zip(periods, period_ends)]
+            infection_matrix, infection_discovery_frac, \
+                recovered_discovery_frac, outside_rate = \
+                (np.stack(x) for x in zip(*current))
+
+            if sim is None:
+                sim = Sim(max_T=self.max_T, init_susceptible=S0,
+                          init_infected=I0, init_recovered=R0,
+                          init_discovered=D0, init_hidden=H0,
+                          infection_rate=infection_matrix,
+                          infection_discovery_frac=infection_discovery_frac,
+                          recovered_discovery_frac=recovered_discovery_frac,
+                          outside_rate=outside_rate)
+
+            sim.step(end - start, infection_rate=infection_matrix,
+                     infection_discovery_frac=infection_discovery_frac,
+                     recovered_discovery_frac=recovered_discovery_frac,
+                     outside_rate=outside_rate)
+
+        return sim.unstack()
+
+    def _validate_strategy(self, strategy: Strategy):
+        """Assert the given strategy is compatible with this scenario."""
+        assert sum(strategy.period_lengths) == self.max_T
+        if self.arrival_period is None:
+            assert strategy.arrival_testing_regime is None
+
+    def _initial_state(self, strategy: Strategy):
+        """Return the initial S, I, R, D, H vectors under the strategy."""
+        # Get initial infections and recovered based on arrival testing
+        # Additionally, compute those that are discovered and hidden
+        init_infections, init_recovered, init_discovered, init_hidden = \
+            strategy.compute_initial_state(self.init_recovered,
+                                           self.pct_recovered_discovered,
+                                           self.init_infections)
+        return self.population.get_init_SIR_and_DH(init_infections,
+                                                   init_recovered,
+                                                   init_discovered,
+                                                   init_hidden)
+
+    def _period_parameters(self, strategy: Strategy):
+        """Return the simulation parameters for each period of the strategy.
+
+        Each period is described by a tuple of the infection matrix, the
+        infection discovery fraction, the recovered discovery fraction, and
+        the outside rate at the group level.
+        """
+        population = self.population
+        symptomatic_rate = self.symptomatic_rate
+        no_surveillance_test_rate = self.no_surveillance_test_rate
+
+        # The group level infection matrix and outside rate do not depend on
+        # the period so they are computed once and scaled per period
+        base_infection_matrix = \
+            population.infection_matrix(self.infections_per_contact_unit)
+        base_outside_rate = population.outside_rate(self.outside_rate)
+
+        # Strategies often reuse one testing regime across periods so the
+        # discovery fractions are computed once per distinct regime
+        discovery_fracs = {}
+
+        parameters = []
+        for testing_regime, multiplier in \
+                zip(strategy.testing_regimes,
+                    strategy.transmission_multipliers):
+            infection_matrix = base_infection_matrix * multiplier
+            if id(testing_regime) not in discovery_fracs:
+                discovery_fracs[id(testing_regime)] = (
+                    population.infection_discovery_frac(
+                        testing_regime.get_infection_discovery_frac(
+                            symptomatic_rate)),
+                    population.recovered_discovery_frac(
+                        testing_regime.get_recovered_discovery_frac(
+                            no_surveillance_test_rate)))
+            infection_discovery_frac, recovered_discovery_frac = \
+                discovery_fracs[id(testing_regime)]
+            outside_rate = base_outside_rate * multiplier
+            parameters.append((infection_matrix, infection_discovery_frac,
+                               recovered_discovery_frac, outside_rate))
+        return parameters
+
+
+def _dictionary_key(d: Dict):
+    """Return a stable hash of the contents of dictionary [d].
+
+    Returns None if [d] can not be hashed, e.g. when a nested dictionary
+    mixes keys of different types that can not be sorted.
+    """
+    try:
+        s = json.dumps(d, sort_keys=True, default=_json_default)
+    except TypeError:
+        return None
+    return hashlib.blake2b(s.encode()).digest()
+
+
+def _json_default(x):
+    """Return a JSON serializable form of [x] (used for NumPy values)."""
+    if isinstance(x, (np.ndarray, np.generic)):
+        return x.tolist()
+    return str(x)
+
 
-def _to_np_array(d: Dict, keys: List):
-    """Return a NumPy array of [d] values ordered by [keys]."""
-    return np.array([d[key] for key in keys])
+def _to_np_array(d: Dict, getter: itemgetter, n: int):
+    """Return a NumPy array of the [n] values of [d] selected by [getter]."""
+    values = getter(d)
+    if n == 1:
+        values = (values,)  # itemgetter of one key returns a bare value
+    return np.fromiter(values, dtype=float, count=n)
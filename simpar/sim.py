@@ -8,8 +8,9 @@ parameters can be specified and the base parameters are used by default.
 
 __author__ = "Peter Frazier (peter-i-frazier)"
 
+import copy
 import numpy as np
-from typing import Union, Dict
+from typing import Union, Dict, List
 
 
 class Sim:
@@ -26,6 +27,11 @@ class Sim:
     susceptible, infectious, and recovered people in each of the K groups over
     T time periods. Additionally, D and H track the number of discovered and
     hidden non-susceptible people.
+
+    Several independent simulations over the same K groups can be run as a
+    batch by passing initial vectors of shape (B, K). The state matrices then
+    have shape (T, B, K) and the infection and discovery parameters may
+    either be shared or given per simulation with a leading axis of size B.
     """
 
     def __init__(self, max_T: int, init_susceptible: np.ndarray,
@@ -35,7 +41,10 @@ class Sim:
                  init_hidden: np.ndarray = None,
                  infection_discovery_frac: Union[float,np.ndarray] = 1,
                  recovered_discovery_frac: Union[float,np.ndarray] = 1,
-                 outside_rate: np.ndarray = 0):
+                 outside_rate: np.ndarray = 0,
+                 dtype: np.dtype = np.float64,
+                 store_history: bool = True,
+                 n_replicates: int = None):
         """Initialize an SIR-style model simulation.
 
         The initial state of the simulation is passed through the
@@ -57,6 +66,19 @@ class Sim:
         determines what fraction of hidden recovered infections are discovered
         in each generation.
 
+        The simulation state and parameters are stored with the given [dtype].
+        Passing np.float32 halves the memory traffic of each step at the cost
+        of precision.
+
+        If [store_history] is False, only the current and next generations
+        are kept in memory and the S, I, R, D, and H properties return the
+        current state vectors instead of the full history.
+
+        Passing [n_replicates] runs that many replicates of the simulation as
+        a batch, all starting from the given (K,) initial vectors. It can not
+        be combined with batched (B, K) initial vectors. The replicates
+        differ through per-replicate infection and discovery parameters.
+
         Args:
             max_T (int): Maximum number of time periods to simulate.
             init_susceptible (np.ndarray): Vector of the initial number of \
@@ -82,42 +104,57 @@ class Sim:
                 (as a np.ndarray). Defaults to 1.
             outside_rate (np.ndarray): infections per time period, weighed by \
                 population of each group in a meta-group.
+            dtype (np.dtype): Floating point type of the simulation state. \
+                Defaults to np.float64.
+            store_history (bool): Keep the state of every generation. \
+                Defaults to True.
+            n_replicates (int): Number of replicates to batch. Defaults to \
+                None (no replicate axis).
         """
         assert (max_T > 0)
         self.max_T = max_T  # number of periods to simulate
         self._t = 0
+        self.dtype = np.dtype(dtype)
 
-        self.K = len(init_susceptible)  # number of groups
-        assert (len(init_infected) == self.K)
-        assert (len(init_recovered) == self.K)
+        shape = np.shape(init_susceptible)  # (K,) or (B, K) when batched
+        self.K = shape[-1]  # number of groups
+        assert (np.shape(init_infected) == shape)
+        assert (np.shape(init_recovered) == shape)
+        if n_replicates is not None:
+            assert (n_replicates >= 1)
+            assert len(shape) == 1, "replicates need (K,) initial vectors"
+            shape = (n_replicates,) + shape  # initial vectors broadcast
 
         self.infection_discovery_frac =  \
-            self._validate_discovery_frac(infection_discovery_frac, self.K)
+            self._validate_discovery_frac(infection_discovery_frac, self.K,
+                                          self.dtype)
         self.recovered_discovery_frac =  \
-            self._validate_discovery_frac(recovered_discovery_frac, self.K)
+            self._validate_discovery_frac(recovered_discovery_frac, self.K,
+                                          self.dtype)
 
         assert ((init_susceptible >= 0).all())
         assert ((init_infected >= 0).all())
         assert ((init_recovered >= 0).all())
 
-        self._S = np.zeros((self.max_T+1, self.K))  # susceptible
-        self._I = np.zeros((self.max_T+1, self.K))  # infected
-        self._R = np.zeros((self.max_T+1, self.K))  # recovered
-        self._D = np.zeros((self.max_T+1, self.K))  # discovered
-        self._H = np.zeros((self.max_T+1, self.K))  # hidden
+        # susceptible, infected, recovered, discovered, and hidden are views
+        # into one contiguous block so a step touches neighbouring memory.
+        # Without history, generation t is stored in row t % 2.
+        self.store_history = store_history
+        rows = self.max_T+1 if store_history else 2
+        self._state = np.zeros((5, rows) + shape, dtype=self.dtype)
 
         self._S[0] = init_susceptible
         self._I[0] = init_infected
         self._R[0] = init_recovered
 
+        discovered_I0 = self._I[0] * self.infection_discovery_frac
         if init_discovered is None:
-            self._D[0] = self._R[0] + \
-                (self._I[0] * self.infection_discovery_frac)
+            self._D[0] = self._R[0] + discovered_I0
         else:
             self._D[0] = init_discovered
 
         if init_hidden is None:
-            self._H[0] = self._I[0] * (1 - self.infection_discovery_frac)
+            self._H[0] = self._I[0] - discovered_I0
         else:
             self._H[0] = init_hidden
 
@@ -125,8 +162,8 @@ class Sim:
         initial_DH = self._D[0] + self._H[0]
         assert np.isclose(initial_IR, initial_DH).all()
 
-        self.infection_rate = infection_rate
-        self.outside_rate = outside_rate
+        self.infection_rate = np.asarray(infection_rate, dtype=self.dtype)
+        self.outside_rate = np.asarray(outside_rate, dtype=self.dtype)
 
     @staticmethod
     def from_dictionary(d: Dict):
@@ -148,45 +185,87 @@ class Sim:
                    recovered_discovery_frac=recovered_discovery_frac,
                    outside_rate=outside_rate)
 
+    # The state matrices are read from [_state] rather than stored so that a
+    # copied or unpickled Sim keeps them in sync with its state block
+    _S = property(lambda self: self._state[0])
+    _I = property(lambda self: self._state[1])
+    _R = property(lambda self: self._state[2])
+    _D = property(lambda self: self._state[3])
+    _H = property(lambda self: self._state[4])
+
     @property
     def S(self):
-        return self._S.copy()
+        return self._history(self._S)
 
     @S.setter
     def S(self, value):
-        self._S = value
+        self._S[:] = value
 
     @property
     def I(self):
-        return self._I.copy()
+        return self._history(self._I)
 
     @I.setter
     def I(self, value):
-        self._I = value
+        self._I[:] = value
 
     @property
     def R(self):
-        return self._R.copy()
+        return self._history(self._R)
 
     @R.setter
     def R(self, value):
-        self._R = value
+        self._R[:] = value
 
     @property
     def D(self):
-        return self._D.copy()
+        return self._history(self._D)
 
     @D.setter
     def D(self, value):
-        self._D = value
+        self._D[:] = value
 
     @property
     def H(self):
-        return self._H.copy()
+        return self._history(self._H)
 
     @H.setter
     def H(self, value):
-        self._H = value
+        self._H[:] = value
+
+    def _history(self, X: np.ndarray):
+        """Return a read-only view of state matrix [X] (or its current row).
+
+        The view shares memory with the simulation so it changes as the
+        simulation is stepped. Copy it to keep or modify the values.
+        """
+        view = X.view() if self.store_history else X[self._t % len(X)]
+        view.flags.writeable = False
+        return view
+
+    def snapshot(self) -> Dict[str, np.ndarray]:
+        """Return writable copies of the S, I, R, D, and H state matrices."""
+        return {"S": self.S.copy(), "I": self.I.copy(), "R": self.R.copy(),
+                "D": self.D.copy(), "H": self.H.copy()}
+
+    def unstack(self) -> List["Sim"]:
+        """Return the simulations of a batch as a list of [Sim]s.
+
+        The returned simulations share memory with this batch.
+        """
+        assert self._state.ndim == 4, "simulation is not batched"
+        sims = []
+        for b in range(self._state.shape[2]):
+            sim = copy.copy(self)
+            sim._state = self._state[:, :, b]
+            sim.infection_rate = _unstack(self.infection_rate, b, 2)
+            sim.outside_rate = _unstack(self.outside_rate, b, 1)
+            sim.infection_discovery_frac = \
+                _unstack(self.infection_discovery_frac, b, 1)
+            sim.recovered_discovery_frac = \
+                _unstack(self.recovered_discovery_frac, b, 1)
+            sims.append(sim)
+        return sims
 
     def step(self, n: int = 1, infection_rate: np.ndarray = None,
              infection_discovery_frac: Union[float,np.ndarray] = None,
@@ -213,72 +292,129 @@ class Sim:
                 population of each group in a meta-group.
         """
         assert (n >= 1)
-        if n > 1:
-            for _ in range(n):
-                self.step(infection_rate=infection_rate,
-                          infection_discovery_frac=infection_discovery_frac,
-                          recovered_discovery_frac=recovered_discovery_frac,
-                          outside_rate=outside_rate)
-            return
 
         if infection_rate is None:
             infection_rate = self.infection_rate
+        else:
+            infection_rate = np.asarray(infection_rate, dtype=self.dtype)
 
         if infection_discovery_frac is None:
             infection_discovery_frac = self.infection_discovery_frac
         else:
             infection_discovery_frac = \
-                self._validate_discovery_frac(infection_discovery_frac, self.K)
+                self._validate_discovery_frac(infection_discovery_frac, self.K,
+                                              self.dtype)
 
         if recovered_discovery_frac is None:
             recovered_discovery_frac = self.recovered_discovery_frac
         else:
             recovered_discovery_frac = \
-                self._validate_discovery_frac(recovered_discovery_frac, self.K)
+                self._validate_discovery_frac(recovered_discovery_frac, self.K,
+                                              self.dtype)
 
         if outside_rate is None:
             outside_rate = self.outside_rate
+        else:
+            outside_rate = np.asarray(outside_rate, dtype=self.dtype)
 
-        t = self._t
-
-        assert (t < self.max_T)  # enforce max generation
-
-        # Fraction susceptible in each group
-        # self._S[t] / (self._S[t] + self._I[t] + self._R[t])
-        frac_susceptible = \
-            np.divide(self._S[t], (self._S[t] + self._I[t] + self._R[t]),
-                      out=np.zeros_like(self._S[t]),
-                      where=(self._S[t] + self._I[t] + self._R[t]) != 0)
-
-        # Infected from internal spread and outside rate
-        self._I[t+1] = np.matmul(self._I[t], infection_rate) * frac_susceptible
-        self._I[t+1] += frac_susceptible * outside_rate
-        # Can not infect more than the infected number of people
-        self._I[t+1] = np.minimum(self._I[t+1], self._S[t])
-
-        # Set susceptible to reflect those that were infected and set
-        # recovered to be the number of people previously infected
-        self._S[t+1] = self._S[t] - self._I[t+1]
-        self._R[t+1] = self._R[t] + self._I[t]
-
-        # Discover some fraction of hidden recoveries
-        self._D[t+1] = \
-            self._D[t] + np.multiply(self._H[t], recovered_discovery_frac)
-        self._H[t+1] = np.multiply(self._H[t], 1 - recovered_discovery_frac)
+        assert (self._t + n <= self.max_T)  # enforce max generation
 
-        # Discover some fraction of those infected in this time period
-        self._D[t+1] += np.multiply(self._I[t+1], infection_discovery_frac)
-        self._H[t+1] += np.multiply(self._I[t+1], 1-infection_discovery_frac)
+        _step_period_kernel(self._state, self._t, n,
+                            infection_rate, outside_rate,
+                            infection_discovery_frac, recovered_discovery_frac)
 
-        self._t = self._t + 1  # move time forward by one step
+        self._t = self._t + n  # move time forward by n steps
 
         return self
 
     @staticmethod
-    def _validate_discovery_frac(x, K):
+    def _validate_discovery_frac(x, K, dtype=np.float64):
         """Return validated discovery fraction vector."""
         if np.isscalar(x):
-            x = x * np.ones(K)
-        assert (x >= 0).all()
-        assert (x <= 1).all()
+            assert 0 <= x <= 1
+            return np.full(K, x, dtype=dtype)
+        x = np.asarray(x, dtype=dtype)
+        assert 0 <= x.min() and x.max() <= 1
         return x
+
+
+def _step_period_kernel(state, t0, n, infection_rate, outside_rate,
+                        infection_discovery_frac, recovered_discovery_frac):
+    """Fill rows [t0+1, ..., t0+n] of the stacked S, I, R, D, H [state].
+
+    The parameters are held constant over the [n] generations so they are
+    resolved and validated once by the caller rather than per generation.
+    """
+    S, I, R, D, H = state
+    rows = state.shape[1]  # generation t is stored in row t % rows
+    # S + I + R is conserved across generations so the inverse population
+    # is computed once. An empty group has S = 0 and gets an inverse of 0.
+    pop = S[t0 % rows] + I[t0 % rows] + R[t0 % rows]
+    inv_pop = np.divide(1, pop, out=np.zeros_like(pop), where=pop > 0)
+    # Terms of all-zero parameters are skipped by the kernel
+    if not np.any(outside_rate):
+        outside_rate = None
+    if not np.any(recovered_discovery_frac):
+        recovered_discovery_frac = None
+    # scratch buffers reused by every generation
+    frac_susceptible = np.empty_like(pop)
+    scratch = np.empty_like(pop)
+    for t in range(t0, t0 + n):
+        a, b = t % rows, (t+1) % rows
+        _step_kernel(S[a], I[a], R[a], D[a], H[a], inv_pop, infection_rate,
+                     outside_rate, infection_discovery_frac,
+                     recovered_discovery_frac, frac_susceptible, scratch,
+                     S[b], I[b], R[b], D[b], H[b])
+
+
+def _step_kernel(S_t, I_t, R_t, D_t, H_t, inv_pop, infection_rate,
+                 outside_rate, infection_discovery_frac,
+                 recovered_discovery_frac, frac_susceptible, scratch,
+                 S_out, I_out, R_out, D_out, H_out):
+    """Write the state one generation after [S_t, I_t, R_t, D_t, H_t].
+
+    [inv_pop] is the inverse of S_t + I_t + R_t (0 for empty groups). An
+    [outside_rate] or [recovered_discovery_frac] of None is all zero. The
+    update is written directly into the [*_out] vectors (typically the next
+    rows of the state matrices) and the [frac_susceptible] and [scratch]
+    buffers so that a generation does not allocate intermediate vectors.
+    """
+    # Fraction susceptible in each group
+    np.multiply(S_t, inv_pop, out=frac_susceptible)
+
+    # Infected from internal spread and outside rate. Treating I as a row
+    # vector (or a stack of them when batched) lets one matmul handle both
+    # shared and per-simulation infection rate matrices.
+    np.matmul(I_t[..., None, :], infection_rate, out=I_out[..., None, :])
+    I_out *= frac_susceptible
+    if outside_rate is not None:
+        np.multiply(frac_susceptible, outside_rate, out=scratch)
+        I_out += scratch
+    # Can not infect more than the susceptible number of people
+    np.minimum(I_out, S_t, out=I_out)
+
+    # Set susceptible to reflect those that were infected and set
+    # recovered to be the number of people previously infected
+    np.subtract(S_t, I_out, out=S_out)
+    np.add(R_t, I_t, out=R_out)
+
+    # Discover some fraction of hidden recoveries. Whatever is discovered
+    # moves from hidden to discovered so one product serves both updates.
+    if recovered_discovery_frac is None:
+        D_out[...] = D_t
+        H_out[...] = H_t
+    else:
+        np.multiply(H_t, recovered_discovery_frac, out=scratch)
+        np.add(D_t, scratch, out=D_out)
+        np.subtract(H_t, scratch, out=H_out)
+
+    # Discover some fraction of those infected in this time period
+    np.multiply(I_out, infection_discovery_frac, out=scratch)
+    D_out += scratch
+    H_out += I_out
+    H_out -= scratch
+
+
+def _unstack(x: np.ndarray, b: int, ndim: int):
+    """Return simulation [b] of parameter [x] if it has a batch axis."""
+    return x[b] if np.ndim(x) > ndim else x
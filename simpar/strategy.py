@@ -12,12 +12,11 @@ __author__ = "Henry Robbins (henryrobbins)"
 
 
 import numpy as np
-from .micro import days_infectious
+from .micro import days_infectious_vec
 from typing import List, Dict
 
 
 class Test:
-    __test__ = False  # include so pytest ignores
     """
     This class maintains properties about a surveillance test.
 
@@ -26,6 +25,9 @@ class Test:
     testing. This assumes compliance rates are equivalent across both
     the susceptible and infected populations.
     """
+    __test__ = False  # include so pytest ignores
+    __slots__ = ("name", "true_sensitivity", "test_sensitivity",
+                 "compliance", "test_delay")
 
     def __init__(self, name: str, test_sensitivity: float, test_delay: float,
                  compliance: float = 1):
@@ -92,6 +94,15 @@ class ArrivalTestingRegime:
         """
         self.pre_departure_test_type = pre_departure_test_type
         self.arrival_test_type = arrival_test_type
+        # fractions discovered in each round of testing per meta-group
+        self._pre_departure_sensitivity = \
+            _test_array(pre_departure_test_type, "true_sensitivity")
+        arrival_sensitivity = \
+            _test_array(arrival_test_type, "true_sensitivity")
+        pct_undiscovered_in_pre_departure = \
+            1 - self._pre_departure_sensitivity
+        self._pct_discovered_in_arrival_test = \
+            pct_undiscovered_in_pre_departure * arrival_sensitivity
 
     @staticmethod
     def from_dictionary(d: Dict, tests: Dict[str, Test]):
@@ -114,16 +125,11 @@ class ArrivalTestingRegime:
 
     def get_pct_discovered_in_pre_departure(self):
         """Return the percentage of infections discovered in pre-departure."""
-        x = [t.true_sensitivity for t in self.pre_departure_test_type]
-        return np.array(x)
+        return self._pre_departure_sensitivity.copy()
 
     def get_pct_discovered_in_arrival_test(self):
         """Return the percentage of infections discovered upon arrival."""
-        x = [t.true_sensitivity for t in self.arrival_test_type]
-        arrival_sensitivity = np.array(x)
-        pct_undiscovered_in_pre_departure = \
-            1 - self.get_pct_discovered_in_pre_departure()
-        return pct_undiscovered_in_pre_departure * arrival_sensitivity
+        return self._pct_discovered_in_arrival_test.copy()
 
 
 class TestingRegime:
@@ -145,6 +151,13 @@ class TestingRegime:
         """
         self.test_type = test_type
         self.tests_per_week = tests_per_week
+        # test properties per meta-group
+        self._test_delay = _test_array(test_type, "test_delay")
+        self._test_sensitivity = _test_array(test_type, "test_sensitivity")
+        self._true_sensitivity = _test_array(test_type, "true_sensitivity")
+        # expected days infectious keyed by max infectious days and the
+        # bytes of tests per week
+        self._days_infectious_cache = {}
 
     @staticmethod
     def from_dictionary(d: Dict, tests: Dict[str, Test]):
@@ -159,26 +172,30 @@ class TestingRegime:
             tests (Dict[str, Test]): Dictionary of [Test] instances.
         """
         test_type = [tests[i] for i in d["test_type"]]
-        tests_per_week = np.array(d["tests_per_week"])
+        tests_per_week = np.array(d["tests_per_week"], dtype=float)
         return TestingRegime(test_type, tests_per_week)
 
     def get_days_infectious(self, max_infectious_days: float):
         """Return the expected number of days infectious.
 
-        This value requires the context of the maximum infectious days.
+        This value requires the context of the maximum infectious days. It
+        is cached per [max_infectious_days] and [tests_per_week] and a copy
+        is returned on repeated calls.
 
         Args:
             max_infectious_days (float): Max days someone is infected."""
-        ret = np.zeros(len(self.test_type))
-
-        for i, (t, f) in enumerate(zip(self.test_type, self.tests_per_week)):
-            days_between_tests = np.inf if f == 0 else 7 / f
-            ret[i] = days_infectious(days_between_tests=days_between_tests,
-                                     isolation_delay=t.test_delay,
-                                     sensitivity=t.true_sensitivity,
-                                     max_infectious_days=max_infectious_days)
-
-        return ret
+        f = np.asarray(self.tests_per_week, dtype=float)
+        key = (max_infectious_days, f.tobytes())
+        cache = self._days_infectious_cache
+        if key not in cache:
+            days_between_tests = \
+                np.divide(7, f, out=np.full(f.shape, np.inf), where=f != 0)
+            cache[key] = days_infectious_vec(
+                days_between_tests=days_between_tests,
+                isolation_delay=self._test_delay,
+                sensitivity=self._true_sensitivity,
+                max_infectious_days=max_infectious_days)
+        return cache[key].copy()
 
     def get_infection_discovery_frac(self, symptomatic_rate: float):
         """Return the discovery rate among infected people.
@@ -192,14 +209,9 @@ class TestingRegime:
         Args:
             symptomatic_rate (float): Symptomatic rate.
         """
-        infection_discovery_frac = np.zeros(len(self.test_type))
-        for i, (t, f) in enumerate(zip(self.test_type, self.tests_per_week)):
-            if f == 0:
-                infection_discovery_frac[i] = \
-                    symptomatic_rate * t.test_sensitivity
-            else:
-                infection_discovery_frac[i] = t.true_sensitivity
-        return infection_discovery_frac
+        return np.where(np.asarray(self.tests_per_week) == 0,
+                        symptomatic_rate * self._test_sensitivity,
+                        self._true_sensitivity)
 
     def get_recovered_discovery_frac(self,
                                      no_surveillance_test_rate: np.ndarray):
@@ -214,14 +226,10 @@ class TestingRegime:
         Args:
             no_surveillance_test_rate (np.ndarray): Test rate per meta-group.
         """
-        recovered_discovery_frac = np.zeros(len(self.test_type))
-        for i, (t, f) in enumerate(zip(self.test_type, self.tests_per_week)):
-            if f == 0:
-                recovered_discovery_frac[i] = \
-                    no_surveillance_test_rate[i] * t.test_sensitivity
-            else:
-                recovered_discovery_frac[i] = t.true_sensitivity
-        return recovered_discovery_frac
+        no_surveillance_test_rate = np.asarray(no_surveillance_test_rate)
+        return np.where(np.asarray(self.tests_per_week) == 0,
+                        no_surveillance_test_rate * self._test_sensitivity,
+                        self._true_sensitivity)
 
 
 class Strategy:
@@ -274,6 +282,17 @@ class Strategy:
             self.pct_discovered_in_arrival_test = \
                 arrival_testing_regime.get_pct_discovered_in_arrival_test()
 
+    @property
+    def _pct_discovered(self):
+        """Fraction of active infections discovered on arrival."""
+        return self.pct_discovered_in_pre_departure + \
+            self.pct_discovered_in_arrival_test
+
+    @property
+    def _pct_undiscovered(self):
+        """Fraction of active infections not discovered on arrival."""
+        return 1 - self._pct_discovered
+
     @staticmethod
     def from_dictionary(d: Dict, arrival_testing_regimes: Dict,
                         testing_regimes: Dict, isolation_regimes: Dict):
@@ -293,11 +312,12 @@ class Strategy:
                 [IsolationRegime] instances.
         """
         name = d["name"]
-        period_lengths = np.array(d["period_lengths"])
+        period_lengths = np.array(d["period_lengths"], dtype=int)
         test_regimes = [testing_regimes[i] for i in d["testing_regimes"]]
         transmission_multipliers = d.get("transmission_multipliers", None)
         if transmission_multipliers is not None:
-            transmission_multipliers = np.array(transmission_multipliers)
+            transmission_multipliers = \
+                np.array(transmission_multipliers, dtype=float)
         arrival_regime = d.get("arrival_testing_regime", None)
         if arrival_regime is not None:
             arrival_regime = arrival_testing_regimes[arrival_regime]
@@ -319,9 +339,7 @@ class Strategy:
             active_infections (np.ndarray): True number of active infections \
                 per meta-group.
         """
-        pct_discovered = self.pct_discovered_in_pre_departure + \
-            self.pct_discovered_in_arrival_test
-        return (1 - pct_discovered) * active_infections
+        return self._pct_undiscovered * active_infections
 
     def get_initial_recovered(self, recovered: np.ndarray,
                               active_infections: np.ndarray):
@@ -332,9 +350,7 @@ class Strategy:
             active_infections (np.ndarray): True number of active infections \
                 per meta-group.
         """
-        pct_discovered = self.pct_discovered_in_pre_departure + \
-            self.pct_discovered_in_arrival_test
-        return recovered + (pct_discovered * active_infections)
+        return recovered + (self._pct_discovered * active_infections)
 
     def get_initial_discovered(self, recovered: np.ndarray,
                                pct_recovered_discovered: np.ndarray,
@@ -349,9 +365,7 @@ class Strategy:
                 per meta-group.
         """
         inactive_discovered = recovered * pct_recovered_discovered
-        pct_discovered = self.pct_discovered_in_pre_departure + \
-            self.pct_discovered_in_arrival_test
-        active_discovered = active_infections * pct_discovered
+        active_discovered = active_infections * self._pct_discovered
         return inactive_discovered + active_discovered
 
     def get_initial_hidden(self, recovered: np.ndarray,
@@ -367,11 +381,39 @@ class Strategy:
                 per meta-group.
         """
         inactive_hidden = recovered * (1 - pct_recovered_discovered)
-        pct_discovered = self.pct_discovered_in_pre_departure + \
-            self.pct_discovered_in_arrival_test
-        active_hidden = active_infections * (1 - pct_discovered)
+        active_hidden = active_infections * self._pct_undiscovered
         return inactive_hidden + active_hidden
 
+    def compute_initial_state(self, recovered: np.ndarray,
+                              pct_recovered_discovered: np.ndarray,
+                              active_infections: np.ndarray):
+        """Return the initial infections, recovered, discovered, and hidden.
+
+        This is equivalent to calling the four get_initial_* methods but
+        shares the products they have in common.
+
+        Args:
+            recovered (np.ndarray): Recovered per meta-group.
+            pct_recovered_discovered (np.ndarray): Percentage of the \
+                recovered population that is discovered per meta-group.
+            active_infections (np.ndarray): True number of active infections \
+                per meta-group.
+        """
+        active_discovered = active_infections * self._pct_discovered
+        active_hidden = active_infections * self._pct_undiscovered
+        init_recovered = recovered + active_discovered
+        init_discovered = \
+            recovered * pct_recovered_discovered + active_discovered
+        init_hidden = \
+            recovered * (1 - pct_recovered_discovered) + active_hidden
+        return active_hidden, init_recovered, init_discovered, init_hidden
+
+
+def _test_array(tests: List[Test], attribute: str):
+    """Return the given [attribute] of each of the [tests] as a NumPy array."""
+    return np.fromiter((getattr(t, attribute) for t in tests), dtype=float,
+                       count=len(tests))
+
 
 def strategies_from_dictionary(d: Dict, tests: Dict):
     """Return a dictionary of strategies.
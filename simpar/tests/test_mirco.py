@@ -1,6 +1,7 @@
 import pytest
 import numpy as np
-from simpar.micro import days_infectious, days_infectious_perfect_sensitivity
+from simpar.micro import (days_infectious, days_infectious_vec,
+                          days_infectious_perfect_sensitivity)
 
 
 @pytest.mark.parametrize("T,D,f,R,I",[
@@ -59,3 +60,19 @@ def test_shorter_max_infectious_days(T,D,f,R):
     (5, 3, 6)])
 def test_zero_sensitivity(T,D,R):
     assert days_infectious(T, D, 0, R) == days_infectious(np.inf, D, 0, R)
+
+
+@pytest.mark.parametrize("R",[1, 5, 10.5])
+def test_days_infectious_vec(R):
+    T, D, f = (x.ravel() for x in np.meshgrid([np.inf, 1, 3, 3.5, 7],
+                                              [0, 1.5, 3, np.inf],
+                                              [0, 0.3, 0.72, 1]))
+    expected = [days_infectious(*x, R) for x in zip(T, D, f)]
+    assert (days_infectious_vec(T, D, f, R) == expected).all()
+
+
+def test_days_infectious_vec_nonpositive_test_interval():
+    with pytest.raises(AssertionError):
+        days_infectious_vec([3.5, -1], [1, 1], [0.5, 0.5], 5)
+    with pytest.raises(AssertionError):
+        days_infectious_vec([0], [1], [0.5], 5)
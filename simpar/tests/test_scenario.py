@@ -1,7 +1,10 @@
 import os
+import copy
 import yaml
+import pytest
+import numpy as np
 from simpar.scenario import Scenario
-from simpar.strategy import strategies_from_dictionary
+from simpar.strategy import Strategy, strategies_from_dictionary
 
 
 RESOURCES_PATH = os.path.join(os.path.dirname(__file__), 'resources')
@@ -14,3 +17,90 @@ with open(os.path.join(RESOURCES_PATH, "test_scenario.yaml"), "r") as f:
 def test_simulate_strategy():
     """Test simulate_strategy method of Scenario class."""
     SCENARIO.simulate_strategy(STRATEGY)
+
+
+def test_simulate_strategies():
+    """Test simulate_strategies matches serial simulate_strategy calls."""
+    sims = SCENARIO.simulate_strategies([STRATEGY, STRATEGY], workers=2)
+    expected = SCENARIO.simulate_strategy(STRATEGY)
+    assert len(sims) == 2
+    for sim in sims:
+        assert np.isclose(sim.I, expected.I).all()
+        assert np.isclose(sim.D, expected.D).all()
+
+
+def test_simulate_strategy_without_validation():
+    """Test simulate_strategy with validation disabled."""
+    sim = SCENARIO.simulate_strategy(STRATEGY, validate=False)
+    expected = SCENARIO.simulate_strategy(STRATEGY)
+    assert np.isclose(sim.I, expected.I).all()
+
+
+def test_packed_parameters():
+    """Test per meta-group parameters are views of the packed matrix."""
+    scenario = Scenario.from_dictionary(yaml_file)
+    assert np.isclose(scenario.outside_rate, [0.5, 0, 1]).all()
+    assert np.isclose(scenario.hospitalization_rates,
+                      [0.001, 0.002, 0.01]).all()
+    scenario.outside_rate = [0, 0, 0]
+    assert np.isclose(scenario.outside_rate, 0).all()
+    assert np.isclose(scenario.init_infections, [4, 11, 3]).all()
+
+
+def test_from_dictionary_returns_copy():
+    """Test memoized from_dictionary returns independent scenarios."""
+    a = Scenario.from_dictionary(yaml_file)
+    b = Scenario.from_dictionary(yaml_file)
+    assert a is not b
+    a.outside_rate = [0, 0, 0]
+    assert np.isclose(b.outside_rate, [0.5, 0, 1]).all()
+
+
+def test_simulate_strategies_batched():
+    """Test batched simulation matches simulating strategies one by one."""
+    shifted = Strategy("shifted", [5, 15], STRATEGY.testing_regimes,
+                       [1, 0.5], STRATEGY.arrival_testing_regime,
+                       STRATEGY.isolation_regime)
+    strategies = [STRATEGY, shifted]
+    sims = SCENARIO.simulate_strategies_batched(strategies)
+    assert len(sims) == 2
+    for strategy, sim in zip(strategies, sims):
+        expected = SCENARIO.simulate_strategy(strategy)
+        for bucket in ["S", "I", "R", "D", "H"]:
+            assert np.isclose(getattr(sim, bucket),
+                              getattr(expected, bucket)).all()
+        recovered_discovery_frac = \
+            SCENARIO._period_parameters(strategy)[0][2]
+        assert np.isclose(sim.recovered_discovery_frac,
+                          recovered_discovery_frac).all()
+        assert np.isclose(expected.recovered_discovery_frac,
+                          recovered_discovery_frac).all()
+
+
+def test_simulate_no_strategies_batched():
+    """Test batched simulation of no strategies is rejected."""
+    with pytest.raises(AssertionError):
+        SCENARIO.simulate_strategies_batched([])
+
+
+def test_simulate_strategy_uses_current_population():
+    """Test changes to the population are picked up by later simulations."""
+    scenario = Scenario.from_dictionary(yaml_file)
+    before = scenario.simulate_strategy(STRATEGY).I
+    K = len(scenario.population.meta_group_list)
+    scenario.population.meta_group_contact_matrix = np.zeros((K, K))
+    after = scenario.simulate_strategy(STRATEGY).I
+    assert not np.isclose(before, after).all()
+
+
+def test_from_dictionary_mixed_keys():
+    """Test a dictionary mixing int and str meta-group names is parsed."""
+    d = copy.deepcopy(yaml_file)
+    d["meta_groups"] = [1 if g == "g1" else g for g in d["meta_groups"]]
+    for v in d.values():
+        if isinstance(v, dict) and "g1" in v:
+            v[1] = v.pop("g1")
+    scenario = Scenario.from_dictionary(d)
+    expected = Scenario.from_dictionary(yaml_file)
+    assert np.isclose(scenario.simulate_strategy(STRATEGY).I,
+                      expected.simulate_strategy(STRATEGY).I).all()
@@ -1,4 +1,6 @@
 import os
+import copy
+import pickle
 import yaml
 import pytest
 import numpy as np
@@ -14,15 +16,26 @@ with open(os.path.join(RESOURCES_PATH, "test_sim.yaml"), "r") as f:
         v.step(v.max_T)
 
 
-def test_return_copy():
-    """Ensure that a copy of the private instance variable is returned."""
+def test_return_read_only():
+    """Ensure that a read-only view of the private variable is returned."""
     sim = SIMULATIONS["three_groups_symmetric_pop"]
     expected = sim.S.copy()
     S = sim.S
-    S[0] = 5 * (S[0] + 5)
+    with pytest.raises(ValueError):
+        S[0] = 5 * (S[0] + 5)
     assert np.isclose(expected, sim.S).all()
 
 
+def test_snapshot():
+    """Ensure that a snapshot is a writable copy of the state."""
+    sim = SIMULATIONS["three_groups_symmetric_pop"]
+    expected = sim.S.copy()
+    snapshot = sim.snapshot()
+    snapshot["S"][0] = 5 * (snapshot["S"][0] + 5)
+    assert np.isclose(expected, sim.S).all()
+    assert np.isclose(snapshot["D"], sim.D).all()
+
+
 @pytest.mark.parametrize("name, sim", SIMULATIONS.items())
 def test_constant_population(name, sim):
     """Test that S+I+R is constant across the simulation."""
@@ -70,3 +83,109 @@ def test_perfect_sensitivity():
     """Test no hidden cases when probability of discovery is 1."""
     sim = SIMULATIONS["perfect_sensitivity"]
     assert np.isclose(np.sum(sim.H, axis=1), np.zeros(sim.max_T+1)).all()
+
+
+def test_multi_step_matches_single_steps():
+    """Test that step(n) matches n calls to step()."""
+    params = sims["three_groups_symmetric_pop"]
+    a = Sim.from_dictionary(params)
+    b = Sim.from_dictionary(params)
+    a.step(a.max_T)
+    for _ in range(b.max_T):
+        b.step()
+    assert np.isclose(a.I, b.I).all()
+    assert np.isclose(a.D, b.D).all()
+    assert np.isclose(a.H, b.H).all()
+
+
+def test_step_past_max_T():
+    """Test that stepping past max_T is rejected."""
+    sim = Sim.from_dictionary(sims["three_groups_symmetric_pop"])
+    with pytest.raises(AssertionError):
+        sim.step(sim.max_T + 1)
+
+
+def test_single_precision():
+    """Test that a float32 simulation tracks the float64 simulation."""
+    params = sims["noninfectious_group"]
+    expected = Sim.from_dictionary(params).step(params["T"])
+    S0 = np.array(params["S0"])
+    I0 = np.array(params["I0"])
+    R0 = np.array(params["R0"])
+    sim = Sim(params["T"], S0, I0, R0, np.array(params["infection_rate"]),
+              infection_discovery_frac=params["infection_discovery_frac"],
+              recovered_discovery_frac=params["recovered_discovery_frac"],
+              dtype=np.float32)
+    sim.step(params["T"])
+    assert sim.I.dtype == np.float32
+    assert np.allclose(sim.I, expected.I, rtol=1e-4, atol=1e-4)
+    assert np.allclose(sim.D, expected.D, rtol=1e-4, atol=1e-4)
+
+
+def test_without_history():
+    """Test a simulation without history ends in the same state."""
+    params = sims["three_groups_symmetric_pop"]
+    expected = Sim.from_dictionary(params).step(params["T"])
+    sim = Sim(params["T"], np.array(params["S0"]), np.array(params["I0"]),
+              np.array(params["R0"]), np.array(params["infection_rate"]),
+              infection_discovery_frac=params["infection_discovery_frac"],
+              recovered_discovery_frac=params["recovered_discovery_frac"],
+              outside_rate=np.array(params["outside_rate"]),
+              store_history=False)
+    sim.step(3)
+    sim.step(params["T"] - 3)
+    for key in ["S", "I", "R", "D", "H"]:
+        assert np.allclose(getattr(sim, key), getattr(expected, key)[-1])
+
+
+def test_batched_simulations():
+    """Test a batch of simulations matches the individual simulations."""
+    names = ["three_groups_symmetric_pop", "noninfectious_group"]
+    singles = [Sim.from_dictionary(sims[name]) for name in names]
+    for sim in singles:
+        sim.step(sim.max_T)
+    S0, I0, R0 = (np.array([sims[name][key] for name in names])
+                  for key in ["S0", "I0", "R0"])
+    infection_rate = np.array([sims[name]["infection_rate"]
+                               for name in names])
+    batch = Sim(20, S0, I0, R0, infection_rate,
+                infection_discovery_frac=0.8, recovered_discovery_frac=0.5)
+    batch.step(20)
+    assert batch.I.shape == (21, 2, 3)
+    for expected, sim in zip(singles, batch.unstack()):
+        assert np.isclose(expected.I, sim.I).all()
+        assert np.isclose(expected.D, sim.D).all()
+        assert np.isclose(expected.infection_rate, sim.infection_rate).all()
+
+
+def test_replicates():
+    """Test replicates with perturbed rates match individual simulations."""
+    params = sims["three_groups_symmetric_pop"]
+    S0, I0, R0 = (np.array(params[key]) for key in ["S0", "I0", "R0"])
+    infection_rate = np.array(params["infection_rate"])
+    scales = [0.5, 1, 2]
+    replicates = Sim(10, S0, I0, R0,
+                     np.array([c * infection_rate for c in scales]),
+                     n_replicates=len(scales)).step(10)
+    assert replicates.I.shape == (11, 3, 3)
+    for c, sim in zip(scales, replicates.unstack()):
+        expected = Sim(10, S0, I0, R0, c * infection_rate).step(10)
+        assert np.isclose(expected.I, sim.I).all()
+        assert np.isclose(expected.H, sim.H).all()
+    with pytest.raises(AssertionError):
+        Sim(10, np.stack([S0, S0]), np.stack([I0, I0]), np.stack([R0, R0]),
+            infection_rate, n_replicates=2)
+
+
+def test_copy_then_step():
+    """Test a copied or pickled partly stepped Sim keeps stepping correctly."""
+    params = sims["three_groups_symmetric_pop"]
+    expected = Sim.from_dictionary(params).step(5)
+    sim = Sim.from_dictionary(params).step(2)
+    for other in [copy.deepcopy(sim), pickle.loads(pickle.dumps(sim))]:
+        other.step(3)
+        for key in ["S", "I", "R", "D", "H"]:
+            assert np.isclose(getattr(other, key),
+                              getattr(expected, key)).all()
+    # stepping the copies leaves the original untouched
+    assert (sim.I[3:] == 0).all()
@@ -1,3 +1,4 @@
+import copy
 import os
 import yaml
 import numpy as np
@@ -103,6 +104,28 @@ def test_testing_regime_three_meta_groups():
                       np.array([0.7 * 0.6, 0.8 * 0.9, 0.5 * 0.6])).all()
 
 
+def test_testing_regime_days_infectious_cached():
+    """Test [TestingRegime] returns a copy of the cached days infectious."""
+    regime = TESTING_REGIMES["three_meta_groups"]
+    expected = regime.get_days_infectious(5)
+    days = regime.get_days_infectious(5)
+    days[0] = -1
+    assert (regime.get_days_infectious(5) == expected).all()
+    assert (regime.get_days_infectious(6) > expected).any()
+
+
+def test_testing_regime_days_infectious_tests_per_week():
+    """Test [TestingRegime] days infectious follows tests per week."""
+    regime = TestingRegime(TESTING_REGIMES["three_meta_groups"].test_type,
+                           np.array([0., 2., 2.]))
+    before = regime.get_days_infectious(5)
+    regime.tests_per_week = np.array([7., 7., 7.])
+    expected = TestingRegime(regime.test_type, regime.tests_per_week)
+    after = regime.get_days_infectious(5)
+    assert (after == expected.get_days_infectious(5)).all()
+    assert (after < before).all()
+
+
 def test_strategy():
     """Test [Strategy] class with three meta-groups."""
     pct_discovered_in_pre_departure = np.array([0.3, 0.72, 0.3])
@@ -119,3 +142,40 @@ def test_strategy():
     expected = recovered + active_infections * pct_discovered
     value = STRATEGY.get_initial_recovered(recovered, active_infections)
     assert np.isclose(value, expected).all()
+
+
+def test_strategy_initial_state():
+    """Test [Strategy] initial state matches the individual getters."""
+    active_infections = np.array([1, 3, 2])
+    recovered = np.array([5, 10, 6])
+    pct_recovered_discovered = np.array([0.5, 0.2, 0.9])
+    expected = [
+        STRATEGY.get_initial_infections(active_infections),
+        STRATEGY.get_initial_recovered(recovered, active_infections),
+        STRATEGY.get_initial_discovered(recovered, pct_recovered_discovered,
+                                        active_infections),
+        STRATEGY.get_initial_hidden(recovered, pct_recovered_discovered,
+                                    active_infections)
+    ]
+    values = STRATEGY.compute_initial_state(recovered,
+                                            pct_recovered_discovered,
+                                            active_infections)
+    for value, x in zip(values, expected):
+        assert np.isclose(value, x).all()
+
+
+def test_strategy_pct_discovered_updates():
+    """Test [Strategy] initial state follows the public discovery fractions."""
+    strategy = copy.deepcopy(STRATEGY)
+    active_infections = np.array([1, 3, 2])
+    recovered = np.array([5, 10, 6])
+    pct_recovered_discovered = np.array([0.5, 0.2, 0.9])
+    strategy.pct_discovered_in_pre_departure = np.zeros(3)
+    strategy.pct_discovered_in_arrival_test = np.zeros(3)
+    value = strategy.get_initial_infections(active_infections)
+    assert (value == active_infections).all()
+    values = strategy.compute_initial_state(recovered,
+                                            pct_recovered_discovered,
+                                            active_infections)
+    assert (values[0] == active_infections).all()
+    assert (values[1] == recovered).all()
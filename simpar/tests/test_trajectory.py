@@ -1,8 +1,9 @@
 import os
 import yaml
+import numpy as np
 from simpar.scenario import Scenario
-from simpar.strategy import strategies_from_dictionary
-from simpar.trajectory import Trajectory
+from simpar.strategy import strategies_from_dictionary, IsolationRegime
+from simpar.trajectory import Trajectory, _get_isolated
 
 
 RESOURCES_PATH = os.path.join(os.path.dirname(__file__), 'resources')
@@ -22,6 +23,18 @@ def test_get_bucket():
     TRAJECTORY.get_bucket("H")
 
 
+def test_get_bucket_meta_groups():
+    population = SCENARIO.population
+    I = TRAJECTORY.get_bucket("I", meta_groups=["g3", "g1"],
+                              aggregate=False)
+    for j, meta_group in enumerate(["g3", "g1"]):
+        idx = population.meta_group_ids(meta_group)
+        expected = np.sum(sim.I[:, idx], axis=1)
+        # the first generations are scaled for the arrival period
+        start = SCENARIO.arrival_period
+        assert np.isclose(I[start:, j], expected[start:]).all()
+
+
 def test_get_hospitalizations():
     TRAJECTORY.get_hospitalizations()
     TRAJECTORY.get_hospitalizations(meta_groups=["g1", "g2"])
@@ -36,3 +49,14 @@ def test_get_isolated():
     TRAJECTORY.get_isolated(meta_groups=["g1", "g2"], aggregate=True)
     TRAJECTORY.get_isolated(cumulative=True)
     TRAJECTORY.get_isolated(normalize=True)
+
+
+def test_isolated_counts():
+    # isolation_frac = [1, .4, .1] (see _get_isolated)
+    regime = IsolationRegime(iso_lengths=[5, 10], iso_props=[0.8, 0.2])
+    discovered = np.array([2, 2, 3, 3, 3])
+    expected = [2, 0.8, 1.2, 0.4, 0.1]
+    assert np.isclose(_get_isolated(discovered, 4, regime), expected).all()
+    isolated = _get_isolated(np.stack([discovered, discovered], axis=1), 4,
+                             regime)
+    assert np.isclose(isolated, np.array([expected, expected]).T).all()
@@ -64,28 +64,28 @@ class Trajectory:
             "H": sim.H
         }[bucket]
 
+        # aggregate across meta-groups with one reduction over the group ids
+        # of the requested meta-groups laid out side by side
+        if meta_groups is None:
+            meta_groups = population.meta_group_names
+        ids = [population.meta_group_ids(mg) for mg in meta_groups]
+        starts = np.cumsum([0] + [len(idx) for idx in ids[:-1]])
+        A = np.add.reduceat(A[:, np.concatenate(ids)], starts, axis=1)
+
         # adjust for arrival period
         arrival_period = self.scenario.arrival_period
         if arrival_period is not None:
-            for i in range(arrival_period):
-                A[i] *= (i / arrival_period)
-
-        # aggregate across meta-groups
-        A_ = []
-        if meta_groups is None:
-            meta_groups = population.meta_group_names
-        for meta_group in meta_groups:
-            idx = population.meta_group_ids(meta_group)
-            A_.append(np.sum(A[:, idx], axis=1))
-        A = np.array(A_).T
+            A[:arrival_period] *= \
+                (np.arange(arrival_period) / arrival_period)[:, None]
 
         if aggregate:
             x = np.sum(A, axis=1)
         else:
             x = A
 
+        # x is a fresh array so the cumulative sum can overwrite it
         if cumulative:
-            x = np.cumsum(x, axis=0)
+            np.cumsum(x, axis=0, out=x)
 
         if normalize:
             total_pop = np.sum(sim.S + sim.I + sim.R, axis=1)[0]
@@ -188,13 +188,12 @@ def _get_isolated(discovered: np.ndarray, generation_time: float,
                 iso_props[i] * \
                 np.clip((duration - generation_time*t) / generation_time, 0, 1)
 
+    # The isolated count is the convolution of the newly discovered in each
+    # generation with isolation_frac (column-wise if not aggregated)
+    new_discovered = np.diff(discovered, axis=0, prepend=0)
+    T = len(discovered)
     isolated = np.zeros(discovered.shape)
-    for t in range(len(discovered)):
-        for i in range(max_isolation):
-            if t-i > 0:
-                tmp = isolation_frac[i] * (discovered[t-i] - discovered[t-i-1])
-                isolated[t] = isolated[t] + tmp
-            if t-i == 0:
-                isolated[t] = isolated[t] + isolation_frac[i] * discovered[t-i]
+    for i in range(min(max_isolation, T)):
+        isolated[i:] += isolation_frac[i] * new_discovered[:T-i]
 
     return isolated